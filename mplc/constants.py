@@ -8,11 +8,24 @@ DEFAULT_BATCH_SIZE = 256
 MAX_BATCH_SIZE = 2 ** 20
 DEFAULT_GRADIENT_UPDATES_PER_PASS_COUNT = 8
 PATIENCE = 10  # patience for early stopping
+# Dtype used to exchange and average model weights between partners.
+# 'float16' halves the memory traffic of the aggregation step at a small precision
+# cost (the aggregated model is always restored as float32)
+FEDAVG_DTYPE = 'float32'
+EARLY_STOP_EVAL_SAMPLES = 5000  # max number of validation samples used for per-round evaluation
+# Number of worker processes used to train Shapley coalitions in parallel
+# (1 = train sequentially in the main process)
+COALITION_TRAINING_PROCESSES = 1
+# Train Keras models under the 'mixed_float16' policy (FP16 compute with FP32 master
+# weights): roughly doubles throughput on Tensor Core GPUs, off by default so that
+# results stay bit-comparable with previous runs
+USE_MIXED_PRECISION = False
+# Directory of the on-disk cache of coalition scores used by the Shapley-based methods,
+# or None to recompute every score. Caching makes re-runs of identical scenarios much
+# cheaper, but defeats the purpose of averaging results over several repeats
+COALITION_SCORES_CACHE_DIR = None
 DEFAULT_BATCH_COUNT = 20
 DEFAULT_EPOCH_COUNT = 40
-# GPU
-GPU_MEMORY_LIMIT_MB = 4096
-
 # Logging
 INFO_LOGGING_FILE_NAME = "info.log"
 DEBUG_LOGGING_FILE_NAME = "debug.log"
@@ -29,6 +42,7 @@ TEST_SET_MAX_SIZE_QUICK_DEMO = 500
 CONTRIBUTIVITY_METHODS = [
     "Shapley values",
     "Independent scores",
+    "MCS",
     "TMCS",
     "ITMCS",
     "IS_lin_S",
@@ -5,18 +5,48 @@ This enables to parameterize the contributivity measurements to be performed.
 
 from __future__ import print_function
 
-import bisect
 import datetime
+import hashlib
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
 from itertools import combinations
 from math import factorial
-from timeit import default_timer as timer
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter_ns
 
 import numpy as np
 from loguru import logger
+from scipy.special import gammaln
 from scipy.stats import norm
 from sklearn.linear_model import LinearRegression
 
 from . import multi_partner_learning, constants
+from ._shapley_numba import aggregate_shapley
+
+
+def _train_coalition(scenario, subset):
+    """Train a model on the partners whose indexes are in subset, and return its test score.
+
+    Module-level so that it can be dispatched to worker processes."""
+    small_partners_list = np.array([scenario.partners_list[i] for i in subset])
+    if len(small_partners_list) > 1:
+        mpl = scenario._multi_partner_learning_approach(scenario,
+                                                        partners_list=small_partners_list,
+                                                        is_early_stopping=True,
+                                                        save_folder=None,
+                                                        **scenario.mpl_kwargs
+                                                        )
+    else:
+        mpl = multi_partner_learning.SinglePartnerLearning(scenario,
+                                                           partner=small_partners_list[0],
+                                                           is_early_stopping=True,
+                                                           save_folder=None,
+                                                           **scenario.mpl_kwargs
+                                                           )
+    mpl.fit()
+    return mpl.history.score
 
 
 class KrigingModel:
@@ -73,6 +103,9 @@ class Contributivity:
         self.first_charac_fct_calls_count = 0
         self.charac_fct_values = {(): 0}
         self.increments_values = [{} for _ in self.scenario.partners_list]
+        self._cache_path = None
+        if constants.COALITION_SCORES_CACHE_DIR is not None:
+            self._init_disk_cache()
 
     def __str__(self):
         computation_time_sec = str(datetime.timedelta(seconds=self.computation_time_sec))
@@ -96,51 +129,101 @@ class Contributivity:
         if tuple(subset) not in self.charac_fct_values:
             # Characteristic_func(permut) has not been computed yet...
             # ... so we compute, store, and return characteristic_func(permut)
-            self.first_charac_fct_calls_count += 1
-            small_partners_list = np.array([self.scenario.partners_list[i] for i in subset])
-            if len(small_partners_list) > 1:
-                mpl = self.scenario._multi_partner_learning_approach(self.scenario,
-                                                                     partners_list=small_partners_list,
-                                                                     is_early_stopping=True,
-                                                                     save_folder=None,
-                                                                     **self.scenario.mpl_kwargs
-                                                                     )
-            else:
-                mpl = multi_partner_learning.SinglePartnerLearning(self.scenario,
-                                                                   partner=small_partners_list[0],
-                                                                   is_early_stopping=True,
-                                                                   save_folder=None,
-                                                                   **self.scenario.mpl_kwargs
-                                                                   )
-            mpl.fit()
-            self.charac_fct_values[tuple(subset)] = mpl.history.score
-            # we add the new increments
-            for i in range(len(self.scenario.partners_list)):
-                if i in subset:
-                    subset_without_i = np.delete(subset, np.argwhere(subset == i))
-                    if (
-                            tuple(subset_without_i) in self.charac_fct_values
-                    ):  # we store the new known increments
-                        self.increments_values[i][tuple(subset_without_i)] = (
-                                self.charac_fct_values[tuple(subset)]
-                                - self.charac_fct_values[tuple(subset_without_i)]
-                        )
-                else:
-                    subset_with_i = np.sort(np.append(subset, i))
-                    if (
-                            tuple(subset_with_i) in self.charac_fct_values
-                    ):  # we store the new known increments
-                        self.increments_values[i][tuple(subset)] = (
-                                self.charac_fct_values[tuple(subset_with_i)]
-                                - self.charac_fct_values[tuple(subset)]
-                        )
+            self._store_characteristic(subset, _train_coalition(self.scenario, subset))
         # else we will Return the characteristic_func(permut) that was already computed
         return self.charac_fct_values[tuple(subset)]
 
+    def _init_disk_cache(self):
+        """Load previously computed coalition scores from the on-disk cache.
+
+        The cache file name fingerprints everything a coalition score depends on: the
+        partners' training data and the learning configuration. Scores computed during
+        this run are saved back to the same file, so that re-running identical scenarios
+        (or a method sharing coalitions with a previous one) reuses the trainings."""
+
+        fingerprint = hashlib.blake2b(digest_size=16)
+        for partner in self.scenario.partners_list:
+            fingerprint.update(np.ascontiguousarray(partner.x_train).tobytes())
+            fingerprint.update(np.ascontiguousarray(partner.y_train).tobytes())
+        learning_config = (self.scenario.multi_partner_learning_approach,
+                           self.scenario.aggregation_weighting,
+                           self.scenario.epoch_count,
+                           self.scenario.minibatch_count,
+                           self.scenario.gradient_updates_per_pass_count,
+                           sorted(self.scenario.mpl_kwargs.items()))
+        fingerprint.update(repr(learning_config).encode())
+
+        cache_dir = Path(constants.COALITION_SCORES_CACHE_DIR)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self._cache_path = cache_dir / f"coalition_scores_{fingerprint.hexdigest()}.pickle"
+        if self._cache_path.exists():
+            with open(self._cache_path, 'rb') as file:
+                self.charac_fct_values.update(pickle.load(file))
+            for subset in self.charac_fct_values:
+                if subset:
+                    self._store_increments(np.asarray(subset))
+            logger.info(f"Loaded {len(self.charac_fct_values) - 1} coalition scores "
+                        f"from cache file {self._cache_path}")
+
+    def _store_characteristic(self, subset, score):
+        """Store a newly computed characteristic function value, along with the increments it reveals"""
+        self.first_charac_fct_calls_count += 1
+        self.charac_fct_values[tuple(subset)] = score
+        self._store_increments(subset)
+        if self._cache_path is not None:
+            with open(self._cache_path, 'wb') as file:
+                pickle.dump(self.charac_fct_values, file)
+
+    def _store_increments(self, subset):
+        # we add the new increments
+        for i in range(len(self.scenario.partners_list)):
+            if i in subset:
+                subset_without_i = np.delete(subset, np.argwhere(subset == i))
+                if (
+                        tuple(subset_without_i) in self.charac_fct_values
+                ):  # we store the new known increments
+                    self.increments_values[i][tuple(subset_without_i)] = (
+                            self.charac_fct_values[tuple(subset)]
+                            - self.charac_fct_values[tuple(subset_without_i)]
+                    )
+            else:
+                subset_with_i = np.sort(np.append(subset, i))
+                if (
+                        tuple(subset_with_i) in self.charac_fct_values
+                ):  # we store the new known increments
+                    self.increments_values[i][tuple(subset)] = (
+                            self.charac_fct_values[tuple(subset_with_i)]
+                            - self.charac_fct_values[tuple(subset)]
+                    )
+
+    def _parallel_characteristics(self, coalitions):
+        """Train the not-yet-computed coalitions among the given ones in parallel worker processes.
+
+        Coalition trainings are independent of each other, so when
+        constants.COALITION_TRAINING_PROCESSES is above 1 they are dispatched to a process
+        pool (the 'spawn' start method avoids forking the TensorFlow runtime). The scores
+        are then folded back into the characteristic function cache, so that the rest of
+        the computation is unchanged."""
+
+        missing = [np.sort(np.asarray(coalition)) for coalition in coalitions
+                   if tuple(np.sort(np.asarray(coalition))) not in self.charac_fct_values]
+        if not missing:
+            return
+        # The main mpl and the past contributivities hold Keras models, which cannot be
+        # pickled to the workers and are not needed to train a coalition
+        scenario = copy(self.scenario)
+        scenario.mpl = None
+        scenario.contributivity_list = []
+        with ProcessPoolExecutor(max_workers=constants.COALITION_TRAINING_PROCESSES,
+                                 mp_context=get_context('spawn')) as executor:
+            scores = executor.map(_train_coalition, [scenario] * len(missing), missing)
+        for subset, score in zip(missing, scores):
+            self._store_characteristic(subset, score)
+
     # %% Generalization of Shapley Value computation
 
     def compute_SV(self):
-        start = timer()
+        start = perf_counter_ns()
         logger.info("# Launching computation of Shapley Value of all partners")
 
         # Initialize list of all players (partners) indexes
@@ -154,6 +237,9 @@ class Contributivity:
 
         # For each coalition, obtain value of characteristic function...
         # ... i.e.: train and evaluate model on partners part of the given coalition
+        if constants.COALITION_TRAINING_PROCESSES > 1:
+            self._parallel_characteristics(coalitions)
+
         characteristic_function = []
 
         for coalition in coalitions:
@@ -169,12 +255,12 @@ class Contributivity:
         self.contributivity_scores = np.array(list_shapley_value)
         self.scores_std = np.zeros(len(list_shapley_value))
         self.normalized_scores = list_shapley_value / np.sum(list_shapley_value)
-        end = timer()
-        self.computation_time_sec = end - start
+        end = perf_counter_ns()
+        self.computation_time_sec = (end - start) / 1e9
 
     # %% compute independent raw scores
     def compute_independent_scores(self):
-        start = timer()
+        start = perf_counter_ns()
 
         logger.info(
             "# Launching computation of perf. scores of models trained independently on each partner"
@@ -184,20 +270,61 @@ class Contributivity:
         performance_scores = []
 
         # Train models independently on each partner and append perf. score to list of perf. scores
+        if constants.COALITION_TRAINING_PROCESSES > 1:
+            self._parallel_characteristics([[i] for i in range(len(self.scenario.partners_list))])
+
         for i in range(len(self.scenario.partners_list)):
             performance_scores.append(self.not_twice_characteristic(np.array([i])))
         self.name = "Independent scores raw"
         self.contributivity_scores = np.array(performance_scores)
         self.scores_std = np.zeros(len(performance_scores))
         self.normalized_scores = performance_scores / np.sum(performance_scores)
-        end = timer()
-        self.computation_time_sec = end - start
+        end = perf_counter_ns()
+        self.computation_time_sec = (end - start) / 1e9
+
+    # %% compute Shapley values with the Monte-carlo permutation sampling method
+    def montecarlo_SV(self, n_samples=100, seed=None):
+        """Return the vector of approximated Shapley value corresponding to a list of partner and
+        a characteristic function using permutation sampling with a fixed sample budget.
+
+        Contrary to the exact computation which trains 2^n - 1 coalitions, the number of
+        trainings is bounded by n_samples * n (minus the cache hits shared across permutations)."""
+        start = perf_counter_ns()
+        n = len(self.scenario.partners_list)
+
+        # Characteristic function on all partners
+        characteristic_all_partners = self.not_twice_characteristic(np.arange(n))
+
+        if n == 1:
+            self.name = "Monte Carlo Shapley"
+            self.contributivity_scores = np.array([characteristic_all_partners])
+            self.scores_std = np.array([0])
+            self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
+        else:
+            rng = np.random.default_rng(seed)
+            contributions = np.zeros((n_samples, n))
+            for t in range(n_samples):
+                permutation = rng.permutation(n)
+                previous_characteristic = 0  # the characteristic function is 0 for the empty set
+                for j in range(n):
+                    current_characteristic = self.not_twice_characteristic(permutation[: j + 1])
+                    contributions[t][permutation[j]] = current_characteristic - previous_characteristic
+                    previous_characteristic = current_characteristic
+            sv = np.mean(contributions, axis=0)
+            self.name = "Monte Carlo Shapley"
+            self.contributivity_scores = sv
+            self.scores_std = np.std(contributions, axis=0) / np.sqrt(n_samples)
+            self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
 
     # %% compute Shapley values with the truncated Monte-carlo method
     def truncated_MC(self, sv_accuracy=0.01, alpha=0.9, truncation=0.05):
         """Return the vector of approximated Shapley value corresponding to a list of partner and
         a characteristic function using the truncated monte-carlo method."""
-        start = timer()
+        start = perf_counter_ns()
         n = len(self.scenario.partners_list)
 
         # Characteristic function on all partners
@@ -208,11 +335,14 @@ class Contributivity:
             self.contributivity_scores = np.array([characteristic_all_partners])
             self.scores_std = np.array([0])
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
         else:
-            contributions = np.array([[]])
-            permutation = np.zeros(n)  # Store the current permutation
+            # Running sums of the sampled contributions and of their squares: the mean and
+            # variance of the estimator are derived from them in O(n) per permutation,
+            # instead of re-stacking and re-scanning all past contributions at every step
+            contributions_sum = np.zeros(n)
+            contributions_sum_of_squares = np.zeros(n)
             t = 0
             q = norm.ppf((1 - alpha) / 2, loc=0, scale=1)
             v_max = 0
@@ -224,11 +354,7 @@ class Contributivity:
             ):
                 t += 1
 
-                if t == 1:
-                    contributions = np.array([np.zeros(n)])
-                else:
-                    contributions = np.vstack((contributions, np.zeros(n)))
-
+                contribution = np.zeros(n)
                 permutation = np.random.permutation(n)  # Store the current permutation
                 char_partnerlists = np.zeros(
                     n + 1
@@ -242,24 +368,27 @@ class Contributivity:
                         char_partnerlists[j + 1] = self.not_twice_characteristic(
                             permutation[: j + 1]
                         )
-                    contributions[-1][permutation[j]] = (
+                    contribution[permutation[j]] = (
                             char_partnerlists[j + 1] - char_partnerlists[j]
                     )
-                v_max = np.max(np.var(contributions, axis=0))
-            sv = np.mean(contributions, axis=0)
+                contributions_sum += contribution
+                contributions_sum_of_squares += contribution ** 2
+                variances = contributions_sum_of_squares / t - (contributions_sum / t) ** 2
+                v_max = np.max(variances)
+            sv = contributions_sum / t
             self.name = "TMC Shapley"
             self.contributivity_scores = sv
-            self.scores_std = np.std(contributions, axis=0) / np.sqrt(t - 1)
+            self.scores_std = np.sqrt(variances) / np.sqrt(t - 1)
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
 
     # %% compute Shapley values with the truncated Monte-carlo method with a small bias correction
 
     def interpol_TMC(self, sv_accuracy=0.01, alpha=0.9, truncation=0.05):
         """Return the vector of approximated Shapley value corresponding to a list of partner and a characteristic
         function using the interpolated truncated monte-carlo method."""
-        start = timer()
+        start = perf_counter_ns()
         n = len(self.scenario.partners_list)
         # Characteristic function on all partners
         characteristic_all_partners = self.not_twice_characteristic(np.arange(n))
@@ -268,11 +397,12 @@ class Contributivity:
             self.contributivity_scores = np.array([characteristic_all_partners])
             self.scores_std = np.array([0])
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
         else:
-            contributions = np.array([[]])
-            permutation = np.zeros(n)  # Store the current permutation
+            # Same running-sums bookkeeping as in truncated_MC
+            contributions_sum = np.zeros(n)
+            contributions_sum_of_squares = np.zeros(n)
             t = 0
             q = norm.ppf((1 - alpha) / 2, loc=0, scale=1)
             v_max = 0
@@ -282,11 +412,7 @@ class Contributivity:
                 # is below the value of sv_accuracy*characteristic_all_partners
                 t += 1
 
-                if t == 1:
-                    contributions = np.array([np.zeros(n)])
-                else:
-                    contributions = np.vstack((contributions, np.zeros(n)))
-
+                contribution = np.zeros(n)
                 permutation = np.random.permutation(n)  # Store the current permutation
                 char_partnerlists = np.zeros(
                     n + 1
@@ -311,17 +437,20 @@ class Contributivity:
                         char_partnerlists[j + 1] = self.not_twice_characteristic(
                             permutation[: j + 1]
                         )
-                    contributions[-1][permutation[j]] = (
+                    contribution[permutation[j]] = (
                             char_partnerlists[j + 1] - char_partnerlists[j]
                     )
-                v_max = np.max(np.var(contributions, axis=0))
-            sv = np.mean(contributions, axis=0)
+                contributions_sum += contribution
+                contributions_sum_of_squares += contribution ** 2
+                variances = contributions_sum_of_squares / t - (contributions_sum / t) ** 2
+                v_max = np.max(variances)
+            sv = contributions_sum / t
             self.name = "ITMCS"
             self.contributivity_scores = sv
-            self.scores_std = np.std(contributions, axis=0) / np.sqrt(t - 1)
+            self.scores_std = np.sqrt(variances) / np.sqrt(t - 1)
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
 
     # # %% compute Shapley values with the importance sampling method
 
@@ -329,7 +458,7 @@ class Contributivity:
         """Return the vector of approximated Shapley value corresponding to a list of partner and \
             a characteristic function using the importance sampling method and a linear interpolation model."""
 
-        start = timer()
+        start = perf_counter_ns()
         n = len(self.scenario.partners_list)
         # Characteristic function on all partners
         characteristic_all_partners = self.not_twice_characteristic(np.arange(n))
@@ -338,8 +467,8 @@ class Contributivity:
             self.contributivity_scores = np.array([characteristic_all_partners])
             self.scores_std = np.array([0])
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
         else:
 
             # definition of the original density
@@ -437,8 +566,8 @@ class Contributivity:
             self.contributivity_scores = shap
             self.scores_std = np.std(contributions, axis=0) / np.sqrt(t - 1)
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
 
     # # %% compute Shapley values with the regression importance sampling method
 
@@ -446,7 +575,7 @@ class Contributivity:
         """Return the vector of approximated Shapley value corresponding
         to a list of partner and a characteristic function using the
         importance sampling method and a regression model."""
-        start = timer()
+        start = perf_counter_ns()
         n = len(self.scenario.partners_list)
 
         if n < 4:
@@ -567,15 +696,15 @@ class Contributivity:
             self.contributivity_scores = shap
             self.scores_std = np.std(contributions, axis=0) / np.sqrt(t - 1)
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
 
     # # %% compute Shapley values with the Kriging adaptive importance sampling method
 
     def AIS_Kriging(self, sv_accuracy=0.01, alpha=0.95, update=50):
         """Return the vector of approximated Shapley value corresponding to a list of partner
         and a characteristic function using the importance sampling method and a Kriging model."""
-        start = timer()
+        start = perf_counter_ns()
 
         n = len(self.scenario.partners_list)
 
@@ -721,15 +850,15 @@ class Contributivity:
             self.contributivity_scores = shap
             self.scores_std = np.std(contributions, axis=0) / np.sqrt(t - 1)
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
 
     # # %% compute Shapley values with the stratified sampling method
 
     def Stratified_MC(self, sv_accuracy=0.01, alpha=0.95):
         """Return the vector of approximated Shapley values using the stratified monte-carlo method."""
 
-        start = timer()
+        start = perf_counter_ns()
 
         N = len(self.scenario.partners_list)
 
@@ -742,8 +871,8 @@ class Contributivity:
             self.contributivity_scores = np.array([characteristic_all_partners])
             self.scores_std = np.array([0])
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
         else:
             # initialization
             gamma = 0.2
@@ -817,15 +946,15 @@ class Contributivity:
             self.contributivity_scores = shap
             self.scores_std = np.sqrt(var)
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
 
     # %% compute Shapley values with the without replacement stratified sampling method
 
     def without_replacment_SMC(self, sv_accuracy=0.01, alpha=0.95):
         """Return the vector of approximated Shapley values using the stratified monte-carlo method."""
 
-        start = timer()
+        start = perf_counter_ns()
 
         N = len(self.scenario.partners_list)
         # Characteristic function on all partners
@@ -836,8 +965,8 @@ class Contributivity:
             self.contributivity_scores = np.array([characteristic_all_partners])
             self.scores_std = np.array([0])
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
         else:
             # initialisation
             t = 0
@@ -936,13 +1065,13 @@ class Contributivity:
             self.contributivity_scores = shap
             self.scores_std = np.sqrt(var)
             self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-            end = timer()
-            self.computation_time_sec = end - start
+            end = perf_counter_ns()
+            self.computation_time_sec = (end - start) / 1e9
 
     # %% compute Partner value by reinforcement learning
 
     def PVRL(self, learning_rate):
-        start = timer()
+        start = perf_counter_ns()
         w = np.zeros(self.scenario.partners_count)
         partner_values = np.exp(w) / (1.0 + np.exp(w))
         # previous_partner_values = np.zeros(self.scenario.partners_count)
@@ -998,10 +1127,10 @@ class Contributivity:
 
         mpl.eval_and_log_final_model_test_perf()
         mpl.save_data()
-        end = timer()
-        mpl.learning_computation_time = end - start
+        end = perf_counter_ns()
+        mpl.learning_computation_time = (end - start) / 1e9
         logger.info(f"Training and evaluation on multiple partners: "
-                    f"done. ({np.round(mpl.learning_computation_time, 3)} seconds)")
+                    f"done. ({round(mpl.learning_computation_time, 3)} seconds)")
 
         self.name = "PVRL"
         self.contributivity_scores = partner_values
@@ -1009,11 +1138,11 @@ class Contributivity:
         self.normalized_scores = self.contributivity_scores / np.sum(
             self.contributivity_scores
         )
-        end = timer()
-        self.computation_time_sec = end - start
+        end = perf_counter_ns()
+        self.computation_time_sec = (end - start) / 1e9
 
     def federated_SBS_linear(self):
-        start = timer()
+        start = perf_counter_ns()
         logger.info(
             "# Launching computation of perf. scores of linear "
             "performance increase compared to previous collective model")
@@ -1030,11 +1159,11 @@ class Contributivity:
         self.name = "Federated step by step linear scores"
         self.contributivity_scores = norm_contributivity_scores
         self.normalized_scores = norm_contributivity_scores
-        end = timer()
-        self.computation_time_sec = end - start
+        end = perf_counter_ns()
+        self.computation_time_sec = (end - start) / 1e9
 
     def federated_SBS_quadratic(self):
-        start = timer()
+        start = perf_counter_ns()
         logger.info(
             "# Launching computation of perf. scores of"
             "quadratic performance increase compared to previous collective model")
@@ -1051,11 +1180,11 @@ class Contributivity:
         self.name = "Federated step by step quadratic scores"
         self.contributivity_scores = norm_contributivity_scores
         self.normalized_scores = norm_contributivity_scores
-        end = timer()
-        self.computation_time_sec = end - start
+        end = perf_counter_ns()
+        self.computation_time_sec = (end - start) / 1e9
 
     def federated_SBS_constant(self):
-        start = timer()
+        start = perf_counter_ns()
         logger.info(
             "# Launching computation of perf. scores of constant"
             "performance increase compared to previous collective model")
@@ -1070,8 +1199,8 @@ class Contributivity:
         self.name = "Federated step by step constant scores"
         self.contributivity_scores = norm_contributivity_scores
         self.normalized_scores = norm_contributivity_scores
-        end = timer()
-        self.computation_time_sec = end - start
+        end = perf_counter_ns()
+        self.computation_time_sec = (end - start) / 1e9
 
     def compute_relative_perf_matrix(self):
 
@@ -1093,8 +1222,8 @@ class Contributivity:
         minibatch_count = multi_partner_learning.minibatch_count
 
         # Calculate first and last computation round kept for contributivity measure
-        first_comp_round_kept = int(np.round(epoch_count * minibatch_count * init_comp_rounds_skipped))
-        last_comp_round_kept = int(np.round(epoch_count * minibatch_count * (1 - final_comp_rounds_skipped)))
+        first_comp_round_kept = round(epoch_count * minibatch_count * init_comp_rounds_skipped)
+        last_comp_round_kept = round(epoch_count * minibatch_count * (1 - final_comp_rounds_skipped))
 
         # Reshape scores matrices
         scores_matrix_collective_reshape = np.reshape(score_matrix_collective_models,
@@ -1112,7 +1241,7 @@ class Contributivity:
         return relative_perf_matrix
 
     def s_model(self):  # TOD refacto
-        start = timer()
+        start = perf_counter_ns()
         mpl = multi_partner_learning.MplSModel(self.scenario)
         mpl.fit()
         theta_estimated = np.zeros((mpl.partners_count,
@@ -1128,8 +1257,8 @@ class Contributivity:
         self.name = "S-Model"
         self.scores_std = np.zeros(mpl.partners_count)
         self.normalized_scores = self.contributivity_scores / np.sum(self.contributivity_scores)
-        end = timer()
-        self.computation_time_sec = end - start
+        end = perf_counter_ns()
+        self.computation_time_sec = (end - start) / 1e9
 
     def compute_contributivity(
             self,
@@ -1146,6 +1275,9 @@ class Contributivity:
         elif method_to_compute == "Independent scores":
             # Contributivity 2: Performance scores of models trained independently on each partner
             self.compute_independent_scores()
+        elif method_to_compute == "MCS":
+            # Contributivity 2bis: Monte Carlo Shapley with permutation sampling
+            self.montecarlo_SV()
         elif method_to_compute == "TMCS":
             # Contributivity 3: Truncated Monte Carlo Shapley
             self.truncated_MC(
@@ -1207,47 +1339,30 @@ def power_set(List):
     return PS
 
 
-def shapley_value(partners_count, char_func_list):  # Updated by @arthurPignet
-    n = partners_count  # Added by @bowni
-    characteristic_function = char_func_list  # Updated by @bowni
+def shapley_value(partners_count, char_func_list):
+    """Compute the exact Shapley values from the characteristic function values.
+
+    char_func_list must be ordered like the output of power_set(range(partners_count)).
+    Coalitions are encoded as bitmasks and the reduction over them is delegated to
+    aggregate_shapley (Numba-compiled when available, NumPy fancy-indexing otherwise).
+    The coalition weights k!(n-k-1)!/n! are computed in the log domain with gammaln,
+    which stays finite for large partner counts."""
+    n = partners_count
 
     if n == 0:
-        logger.info("No players, exiting")  # Updated by @bowni
+        logger.info("No players, exiting")
         quit()
 
-    temp_list = list([i for i in range(n)])
-    N = power_set(temp_list)
-
-    shapley_values = []
-    for i in range(n):
-        shapley = 0
-        for j in N:
-            if i not in j:
-                cmod = len(j)
-                Cui = j[:]
-                bisect.insort_left(Cui, i)
-                l = N.index(j)  # noqa: E741
-                k = N.index(Cui)
-                temp = (
-                        float(
-                            float(characteristic_function[k])
-                            - float(characteristic_function[l])
-                        )
-                        * float(factorial(cmod) * factorial(n - cmod - 1))  # Updated by @arthurPignet
-                        / float(factorial(n))  # Updated by @arthurPignet
-                )
-                shapley += temp
-
-        cmod = 0
-        Cui = [i]
-        k = N.index(Cui)
-        temp = (
-                float(characteristic_function[k])
-                * float(factorial(cmod) * factorial(n - cmod - 1))  # Updated by @arthurPignet
-                / float(factorial(n))  # Updated by @arthurPignet
-        )
-        shapley += temp
+    # Characteristic function indexed by coalition bitmask (values[0] is the empty set)
+    values = np.zeros(2 ** n)
+    for coalition, value in zip(power_set(list(range(n))), char_func_list):
+        mask = 0
+        for i in coalition:
+            mask |= 1 << i
+        values[mask] = value
 
-        shapley_values.append(shapley)
+    k = np.arange(n)
+    log_weights = gammaln(k + 1) + gammaln(n - k) - gammaln(n + 1)
+    weights = np.exp(log_weights)
 
-    return shapley_values  # Added by @bowni
+    return aggregate_shapley(values, weights, n)
@@ -249,6 +249,18 @@ class Titanic(Dataset):
         """Return a usable dataset"""
         path = Path(__file__).resolve().parents[0]
         folder = path / 'local_data' / 'titanic'
+
+        # The feature engineering is re-done identically at every run: cache the
+        # preprocessed arrays next to the raw csv, and memory-map them on reload so
+        # nothing is deserialized until the arrays are actually indexed
+        x_cache = folder / 'titanic_x_preprocessed.npy'
+        y_cache = folder / 'titanic_y_preprocessed.npy'
+        if x_cache.is_file() and y_cache.is_file():
+            x = np.load(x_cache, mmap_mode='r')
+            y = np.load(y_cache, mmap_mode='r')
+            x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.1, random_state=42)
+            return (x_train, y_train), (x_test, y_test)
+
         if not folder.is_dir():
             Path.mkdir(folder, parents=True)
             logger.info('Titanic dataset not found. Downloading it...')
@@ -282,6 +294,9 @@ class Titanic(Dataset):
         y = raw_dataset['Survived']
         y = y.to_numpy(dtype='float32')
 
+        np.save(x_cache, x)
+        np.save(y_cache, y)
+
         x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.1, random_state=42)
 
         return (x_train, y_train), (x_test, y_test)
@@ -578,9 +593,18 @@ class Esc50(Dataset):
             package.extractall(f'{path}/')
 
         Path.unlink(Path(path) / 'ESC-50.zip')
+        # The extracted files live on the same filesystem as their destination, so a
+        # rename(2) via Path.replace moves them without copying any bytes (shutil.move
+        # stays as a fallback for exotic cross-device setups)
         for src in glob.glob(f'{path}/ESC-50-master/audio'):
-            shutil.move(src, f'{path}/{str(Path(src).name)}')
-        shutil.move(f'{path}/ESC-50-master/meta/esc50.csv', f'{path}/esc50.csv')
+            try:
+                Path(src).replace(f'{path}/{str(Path(src).name)}')
+            except OSError:
+                shutil.move(src, f'{path}/{str(Path(src).name)}')
+        try:
+            Path(f'{path}/ESC-50-master/meta/esc50.csv').replace(f'{path}/esc50.csv')
+        except OSError:
+            shutil.move(f'{path}/ESC-50-master/meta/esc50.csv', f'{path}/esc50.csv')
 
         shutil.rmtree(f'{path}/ESC-50-master')
 
@@ -613,3 +637,13 @@ class Esc50(Dataset):
             metrics=self.model_metrics_names[1:],
         )
         return model
+
+
+# Supported datasets
+IMPLEMENTED_DATASETS = {
+    constants.MNIST: Mnist,
+    constants.CIFAR10: Cifar10,
+    constants.TITANIC: Titanic,
+    constants.ESC50: Esc50,
+    constants.IMDB: Imdb,
+}
@@ -5,12 +5,12 @@ An Experiment regroups multiple scenarios and enables to run them and analyze th
 
 import datetime
 import os
-import uuid
 from pathlib import Path
 from shutil import copyfile
 
 import matplotlib.pyplot as plt
 import pandas as pd
+from joblib import Parallel, delayed
 from loguru import logger
 
 from . import scenario as scenario_module
@@ -20,6 +20,14 @@ from .utils import get_scenario_params_list, load_cfg
 DEFAULT_CONFIG_FILE = "../config.yml"
 
 
+def _run_scenario(scenario):
+    """Run a single scenario and return its results dataframe.
+
+    Module-level so that parallel experiment runs can ship it to worker processes."""
+    scenario.run()
+    return scenario.to_dataframe()
+
+
 class ScenarioList(list):
     def __init__(self, experiment):
         self.experiment = experiment
@@ -90,6 +98,7 @@ class Experiment:
             nb_repeats=1,
             scenarios_list=[],
             is_save=True,
+            n_jobs=1,
             **kwargs
     ):
         """
@@ -99,6 +108,9 @@ class Experiment:
         :param scenarios_list: list, list of scenarios to be run during the experiment.
                                Scenario can also be added via the .add_scenario() method.
         :param is_save: boolean. If set to True, the experiment will be save on disk.
+        :param n_jobs: int, number of processes the scenarios of a repeat are spread over
+                       (joblib semantics, -1 meaning one per core). The default of 1 runs
+                       them sequentially in the current process.
         """
 
         now = datetime.datetime.now()
@@ -114,18 +126,28 @@ class Experiment:
         for scenario in scenarios_list:
             self.add_scenario(scenario)
         self.nb_repeats = nb_repeats
+        self.n_jobs = n_jobs
 
     def define_experiment_path(self, **kwargs):
         """Define the path and create folder for saving results of the experiment"""
 
-        experiment_path = Path.cwd() / kwargs.get('experiment_path',
-                                                  constants.EXPERIMENTS_FOLDER_NAME) / self.name
+        experiments_folder = Path.cwd() / kwargs.get('experiment_path',
+                                                     constants.EXPERIMENTS_FOLDER_NAME)
+        experiment_path = experiments_folder / self.name
 
         # Check if experiment folder already exists
         if experiment_path.exists():
             logger.warning(f"Experiment folder {experiment_path} already exists")
-            new_experiment_name = Path(f"{experiment_path}_{uuid.uuid4().hex[:3]}")  # to distinguish identical names
-            experiment_path = Path.cwd() / constants.EXPERIMENTS_FOLDER_NAME / new_experiment_name
+            # A single directory listing gives the highest suffix already in use,
+            # instead of probing candidate names with one stat call each. os.scandir
+            # yields plain entry names without building a Path object per entry
+            prefix = f"{self.name}_"
+            suffixes = [0]
+            with os.scandir(experiments_folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith(prefix) and entry.name[len(prefix):].isdigit():
+                        suffixes.append(int(entry.name[len(prefix):]))
+            experiment_path = experiments_folder / f"{self.name}_{max(suffixes) + 1}"
             logger.warning(f"Experiment folder has been renamed to: {experiment_path}")
 
         experiment_path.mkdir(parents=True, exist_ok=False)
@@ -135,6 +157,14 @@ class Experiment:
     def add_scenario(self, scenario_to_add):
         self.scenarios_list.append(scenario_to_add)
 
+    def _register_scenario_results(self, df_results, repeat_idx, scenario_idx, results_file):
+        """Tag a scenario's results dataframe and append it to the shared results file"""
+        df_results["repeat_index"] = repeat_idx
+        df_results["scenario_index"] = scenario_idx
+        if self.is_save:
+            df_results.to_csv(results_file, header=results_file.tell() == 0, index=False)
+            results_file.flush()  # results stay readable while the experiment runs
+
     def run(self):
         """Run the experiment """
 
@@ -144,38 +174,63 @@ class Experiment:
         if self.is_save:
             utils.set_log_file(self.experiment_path)  # Move log files to experiment folder
 
-        # Loop over nb_repeats
-        for repeat_idx in range(self.nb_repeats):
-
-            repeat_index_str = f"{repeat_idx + 1}/{self.nb_repeats}"
-            logger.info(f"(Experiment {self.name}) Now starting repeat {repeat_index_str}")
+        # Per-scenario results are gathered in a list and concatenated once at the end:
+        # DataFrame.append re-copies the whole accumulated frame at every scenario
+        results_frames = []
 
-            # Loop over scenarios in scenarios_list
-            for scenario_idx, blank_scenario in enumerate(self.scenarios_list):
-                scenario_index_str = f"{scenario_idx + 1}/{len(self.scenarios_list)}"
-                logger.info(f"(Experiment {self.name}, repeat {repeat_index_str}) "
-                            f"Now running scenario {scenario_index_str}")
+        # Open the results file once for the whole experiment, rather than
+        # re-opening (and re-seeking to the end of) it for every scenario
+        results_file = None
+        if self.is_save:
+            results_file = open(self.experiment_path / constants.EXPERIMENT_RESULT_FILE_NAME, "a")
 
-                # Run the scenario
-                if self.is_save:
-                    scenario = blank_scenario.copy(repeat_count=repeat_idx, save_path=self.experiment_path)
+        # Loop over nb_repeats
+        try:
+            for repeat_idx in range(self.nb_repeats):
+
+                repeat_index_str = f"{repeat_idx + 1}/{self.nb_repeats}"
+                logger.info(f"(Experiment {self.name}) Now starting repeat {repeat_index_str}")
+
+                # Copy the blank scenarios of this repeat
+                scenarios = []
+                for blank_scenario in self.scenarios_list:
+                    if self.is_save:
+                        scenarios.append(blank_scenario.copy(repeat_count=repeat_idx,
+                                                             save_path=self.experiment_path))
+                    else:
+                        scenarios.append(blank_scenario.copy(repeat_count=repeat_idx))
+
+                # Loop over scenarios in scenarios_list
+                if self.n_jobs != 1:
+                    # Scenarios share no state, so they can run in separate worker
+                    # processes; the loky backend gives each worker its own TensorFlow
+                    # runtime and Keras session
+                    logger.info(f"(Experiment {self.name}, repeat {repeat_index_str}) "
+                                f"Now running the {len(scenarios)} scenarios on {self.n_jobs} jobs")
+                    scenarios_results = Parallel(n_jobs=self.n_jobs, backend='loky', batch_size=1)(
+                        delayed(_run_scenario)(scenario) for scenario in scenarios)
+                    for scenario_idx, df_results in enumerate(scenarios_results):
+                        self._register_scenario_results(df_results, repeat_idx, scenario_idx, results_file)
+                        results_frames.append(df_results)
                 else:
-                    scenario = blank_scenario.copy(repeat_count=repeat_idx)
-                scenario.run()
-
-                # Save scenario results
-                df_results = scenario.to_dataframe()
-                df_results["repeat_index"] = repeat_idx
-                df_results["scenario_index"] = scenario_idx
-
-                if self.is_save:
-                    with open(self.experiment_path / constants.EXPERIMENT_RESULT_FILE_NAME, "a") as f:
-                        df_results.to_csv(f, header=f.tell() == 0, index=False)
-                        logger.info(
-                            f"(Experiment {self.name}, repeat {repeat_index_str}, scenario {scenario_index_str}) "
-                            f"Results saved to results.csv in folder {os.path.relpath(self.experiment_path)}")
-
-                self.result = self.result.append(df_results)
+                    for scenario_idx, scenario in enumerate(scenarios):
+                        scenario_index_str = f"{scenario_idx + 1}/{len(scenarios)}"
+                        logger.info(f"(Experiment {self.name}, repeat {repeat_index_str}) "
+                                    f"Now running scenario {scenario_index_str}")
+                        df_results = _run_scenario(scenario)
+                        self._register_scenario_results(df_results, repeat_idx, scenario_idx, results_file)
+                        if self.is_save:
+                            logger.info(
+                                f"(Experiment {self.name}, repeat {repeat_index_str}, "
+                                f"scenario {scenario_index_str}) Results saved to results.csv "
+                                f"in folder {os.path.relpath(self.experiment_path)}")
+                        results_frames.append(df_results)
+        finally:
+            if results_file is not None:
+                results_file.close()
+
+        if results_frames:
+            self.result = pd.concat(results_frames, ignore_index=True)
 
         # TODO: Produce a default analysis notebook
         pass
@@ -195,8 +250,13 @@ def init_experiment_from_config_file(path_to_config_file):
     experiment = Experiment(**exp_params)
 
     #  copy the config file into the result folder
+    # A hardlink references the same inode without copying any bytes; fall back to a
+    # real copy when linking is impossible (cross-device source, unsupported filesystem)
     target_yaml_filepath = experiment.experiment_path / Path(path_to_config_file).name
-    copyfile(path_to_config_file, target_yaml_filepath)
+    try:
+        os.link(path_to_config_file, target_yaml_filepath)
+    except OSError:
+        copyfile(path_to_config_file, target_yaml_filepath)
 
     scenario_params_list = get_scenario_params_list(config["scenario_params_list"])
 
@@ -3,11 +3,19 @@ import pickle
 from abc import ABC
 from copy import deepcopy
 
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import tensorflow as tf
 
+from . import constants
+from ._fedavg_numba import average_layers
+
+# Figures are only ever written to files: the non-interactive Agg backend skips any
+# GUI event-loop setup and works on headless machines
+matplotlib.use('Agg')
+
 
 class History:
     def __init__(self, mpl):
@@ -28,35 +36,28 @@ class History:
                                      'val_loss': np.zeros((mpl.epoch_count, mpl.minibatch_count))}
 
     def partners_to_dataframe(self):
-        temp_dict = {'Model': [],
-                     'Epoch': [],
-                     'Minibatch': []}
-        for key in self.metrics:
-            temp_dict[key] = []
+        # The (epoch, minibatch) grid is the same for every partner and metric:
+        # flatten each metric matrix once instead of indexing cell by cell
+        epoch_count, minibatch_count = self.history['mpl_model']['val_loss'].shape
+        epochs = np.repeat(np.arange(epoch_count), minibatch_count)
+        minibatches = np.tile(np.arange(minibatch_count), epoch_count)
+        partners_frames = []
         for partner_id, hist in [(key, value) for key, value in self.history.items() if key != 'mpl_model']:
-            epoch_count, minibatch_count = self.history['mpl_model']['val_loss'].shape
-            for epoch in range(epoch_count):
-                for mb in range(minibatch_count):
-                    temp_dict['Model'].append(f'partner_{partner_id}')
-                    temp_dict['Epoch'].append(epoch)
-                    temp_dict['Minibatch'].append(mb)
-                    for metric, matrix in hist.items():
-                        temp_dict[metric].append(matrix[epoch, mb])
-        return pd.DataFrame.from_dict(temp_dict)
+            temp_dict = {'Model': f'partner_{partner_id}',
+                         'Epoch': epochs,
+                         'Minibatch': minibatches}
+            for metric, matrix in hist.items():
+                temp_dict[metric] = matrix.ravel()
+            partners_frames.append(pd.DataFrame(temp_dict))
+        return pd.concat(partners_frames, ignore_index=True)
 
     def global_model_to_dataframe(self):
-        temp_dict = {'Epoch': [],
-                     'Minibatch': []}
-        for key in self.history['mpl_model'].keys():
-            temp_dict[key] = []
         epoch_count, minibatch_count = self.history['mpl_model']['val_loss'].shape
-        for epoch in range(epoch_count):
-            for mb in range(minibatch_count):
-                temp_dict['Epoch'].append(epoch)
-                temp_dict['Minibatch'].append(mb)
-                for metric, matrix in self.history['mpl_model'].items():
-                    temp_dict[metric].append(matrix[epoch, mb])
-        return pd.DataFrame.from_dict(temp_dict)
+        temp_dict = {'Epoch': np.repeat(np.arange(epoch_count), minibatch_count),
+                     'Minibatch': np.tile(np.arange(minibatch_count), epoch_count)}
+        for metric, matrix in self.history['mpl_model'].items():
+            temp_dict[metric] = matrix.ravel()
+        return pd.DataFrame(temp_dict)
 
     def history_to_dataframe(self):
         partners_df = self.partners_to_dataframe()
@@ -82,32 +83,34 @@ class History:
 
         if not os.path.exists(self.save_folder / 'graphs/'):
             os.makedirs(self.save_folder / 'graphs/')
-        plt.figure()
-        plt.plot(self.history['mpl_model']['val_loss'][:, -1])
-        plt.ylabel("Loss")
-        plt.xlabel("Epoch")
-        plt.savefig(self.save_folder / "graphs/federated_training_val_loss.png")
-        plt.close()
-
-        plt.figure()
-        plt.plot(self.history['mpl_model']['val_accuracy'][:, -1])
-        plt.ylabel("Accuracy")
-        plt.xlabel("Epoch")
-        plt.ylim([0, 1])
-        plt.savefig(self.save_folder / "graphs/federated_training_val_acc.png")
-        plt.close()
-
-        plt.figure()
+
+        # A single figure is reused for the three graphs: allocating and tearing down
+        # a figure per graph is the expensive part of saving these plots
+        fig, ax = plt.subplots()
+
+        ax.plot(self.history['mpl_model']['val_loss'][:, -1])
+        ax.set_ylabel("Loss")
+        ax.set_xlabel("Epoch")
+        fig.savefig(self.save_folder / "graphs/federated_training_val_loss.png")
+        ax.clear()
+
+        ax.plot(self.history['mpl_model']['val_accuracy'][:, -1])
+        ax.set_ylabel("Accuracy")
+        ax.set_xlabel("Epoch")
+        ax.set_ylim([0, 1])
+        fig.savefig(self.save_folder / "graphs/federated_training_val_acc.png")
+        ax.clear()
+
         for key, value in self.history.items():
-            plt.plot(value['val_accuracy'][:, -1],
-                     label=(f'partner {key}' if key != 'mpl_model' else key))
-        plt.title("Model accuracy")
-        plt.ylabel("Accuracy")
-        plt.xlabel("Epoch")
-        plt.legend()
-        plt.ylim([0, 1])
-        plt.savefig(self.save_folder / "graphs/all_partners_val_acc.png")
-        plt.close()
+            ax.plot(value['val_accuracy'][:, -1],
+                    label=(f'partner {key}' if key != 'mpl_model' else key))
+        ax.set_title("Model accuracy")
+        ax.set_ylabel("Accuracy")
+        ax.set_xlabel("Epoch")
+        ax.legend()
+        ax.set_ylim([0, 1])
+        fig.savefig(self.save_folder / "graphs/all_partners_val_acc.png")
+        plt.close(fig)
 
 
 #####################################
@@ -118,12 +121,11 @@ class History:
 
 @tf.function
 def _tf_aggregete_grads(grads, agg_w):
+    # The whole reduction happens in-graph: gradients stay on device and the
+    # aggregation weights (normalized to sum to 1) are applied as tensor scalings
     global_grad = list()
     for grad_per_layer in zip(*grads):
-        g = list()
-        for g_p, w in zip(grad_per_layer, agg_w):
-            g.append(g_p)
-        global_grad.append(tf.reduce_mean(g, axis=0))
+        global_grad.append(tf.add_n([g * w for g, w in zip(grad_per_layer, agg_w)]))
     return global_grad
 
 
@@ -143,15 +145,23 @@ class Aggregator(ABC):
     def aggregate_model_weights(self):
         """Aggregate model weights from the list of partner's models, with a weighted average"""
 
-        weights_per_layer = list(zip(*[partner.model_weights for partner in self.mpl.partners_list]))
-        new_weights = list()
+        weights = [partner.model_weights for partner in self.mpl.partners_list]
+
+        # Optionally exchange the weights in reduced precision (constants.FEDAVG_DTYPE)
+        fedavg_dtype = np.dtype(constants.FEDAVG_DTYPE)
+        reduced_precision = fedavg_dtype != np.dtype('float32')
+        if reduced_precision:
+            weights = [[layer.astype(fedavg_dtype, copy=False) for layer in partner_weights]
+                       for partner_weights in weights]
+
+        # Normalize the weights once so the reduction below is a plain weighted sum
+        agg_weights = np.asarray(self.aggregation_weights, dtype='float32')
+        agg_weights = agg_weights / agg_weights.sum()
 
-        for weights_for_layer in weights_per_layer:
-            avg_weights_for_layer = np.average(
-                np.array(weights_for_layer), axis=0, weights=self.aggregation_weights
-            )
-            new_weights.append(avg_weights_for_layer)
+        new_weights = average_layers(weights, agg_weights)
 
+        if reduced_precision:
+            new_weights = [layer.astype('float32') for layer in new_weights]
         return new_weights
 
     def aggregate_gradients(self):
@@ -164,7 +174,50 @@ class UniformAggregator(Aggregator):
 
     def __init__(self, mpl):
         super(UniformAggregator, self).__init__(mpl)
-        self.aggregation_weights = list(np.ones(self.mpl.partners_count, dtype='float32') * self.mpl.partners_count)
+        self.aggregation_weights = [np.float32(1 / self.mpl.partners_count)] * self.mpl.partners_count
+
+
+class RingAllReduceAggregator(UniformAggregator):
+    name = 'Ring all-reduce'
+
+    def aggregate_model_weights(self):
+        """Aggregate model weights with a uniform average computed via a ring all-reduce schedule
+
+        The flattened model is cut in partners_count chunks and reduced following the
+        bandwidth-optimal ring schedule (reduce-scatter then all-gather): each step only
+        touches one chunk per partner instead of the full model, which keeps the working
+        set small and mirrors what a distributed deployment of the simulation would do.
+        """
+
+        weights = [partner.model_weights for partner in self.mpl.partners_list]
+        agg_weights = np.asarray(self.aggregation_weights, dtype='float32')
+        agg_weights = agg_weights / agg_weights.sum()
+        n = len(weights)
+
+        layer_shapes = [layer.shape for layer in weights[0]]
+        layer_sizes = [layer.size for layer in weights[0]]
+
+        # Each partner contributes its flattened, pre-weighted model, cut in n chunks
+        chunks = [
+            np.array_split(np.concatenate([layer.ravel() for layer in partner_weights]) * w, n)
+            for partner_weights, w in zip(weights, agg_weights)
+        ]
+
+        # Reduce-scatter: at each step, partner i passes chunk (i - step) % n to partner
+        # (i + 1) % n, which accumulates it. After n - 1 steps, chunk j is fully reduced
+        # at partner (j + n - 1) % n
+        for step in range(n - 1):
+            for i in range(n):
+                chunk_index = (i - step) % n
+                chunks[(i + 1) % n][chunk_index] += chunks[i][chunk_index]
+
+        # All-gather: concatenate the fully reduced chunks back into one flat model
+        flat_model = np.concatenate([chunks[(j + n - 1) % n][j] for j in range(n)])
+
+        # Restore the per-layer structure
+        split_points = np.cumsum(layer_sizes)[:-1]
+        return [flat_layer.reshape(shape)
+                for flat_layer, shape in zip(np.split(flat_model, split_points), layer_shapes)]
 
 
 class DataVolumeAggregator(Aggregator):
@@ -172,8 +225,8 @@ class DataVolumeAggregator(Aggregator):
 
     def __init__(self, mpl):
         super(DataVolumeAggregator, self).__init__(mpl)
-        partners_sizes = [partner.data_volume for partner in self.mpl.partners_list]
-        self.aggregation_weights = list((partners_sizes / np.sum(partners_sizes).astype('float32')))
+        partners_sizes = np.asarray([partner.data_volume for partner in self.mpl.partners_list], dtype='float32')
+        self.aggregation_weights = list(partners_sizes / partners_sizes.sum())
 
 
 class ScoresAggregator(Aggregator):
@@ -183,8 +236,8 @@ class ScoresAggregator(Aggregator):
         super(ScoresAggregator, self).__init__(mpl)
 
     def prepare_aggregation_weights(self):
-        last_scores = [partner.last_round_score for partner in self.mpl.partners_list]
-        self.aggregation_weights = list((last_scores / np.sum(last_scores)).astype('float32'))
+        last_scores = np.asarray([partner.last_round_score for partner in self.mpl.partners_list], dtype='float32')
+        self.aggregation_weights = list(last_scores / last_scores.sum())
 
     def aggregate_model_weights(self):
         self.prepare_aggregation_weights()
@@ -198,6 +251,7 @@ class ScoresAggregator(Aggregator):
 # Supported _aggregation weights approaches
 AGGREGATORS = {
     "uniform": UniformAggregator,
+    "ring-allreduce": RingAllReduceAggregator,
     "data-volume": DataVolumeAggregator,
     "local-score": ScoresAggregator
 }
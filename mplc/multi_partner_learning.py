@@ -6,7 +6,8 @@ Functions for model training and evaluation (single-partner and multi-partner ca
 import operator
 import os
 from abc import ABC, abstractmethod
-from timeit import default_timer as timer
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter_ns
 
 import numpy as np
 import tensorflow as tf
@@ -66,6 +67,18 @@ class MultiPartnerLearning(ABC):
         # Unpack dataset-related parameters
         self.val_data = (self.dataset.x_val, self.dataset.y_val)
         self.test_data = (self.dataset.x_test, self.dataset.y_test)
+
+        # The per-round evaluations only track progress and feed the early stopping criterion:
+        # a fixed subsample of the validation set is enough for that, and it keeps the
+        # evaluation cost independent of the validation set size. The final performance
+        # is still measured on the full test set.
+        if len(self.val_data[0]) > constants.EARLY_STOP_EVAL_SAMPLES:
+            eval_idx = np.random.RandomState(0).choice(
+                len(self.val_data[0]), size=constants.EARLY_STOP_EVAL_SAMPLES, replace=False)
+            self.round_eval_data = (self.val_data[0][eval_idx], self.val_data[1][eval_idx])
+        else:
+            self.round_eval_data = self.val_data
+        self._round_eval_dataset = None
         self.dataset_name = self.dataset.name
         self.generate_new_model = self.dataset.generate_new_model
 
@@ -73,6 +86,7 @@ class MultiPartnerLearning(ABC):
         model = self.init_model()
         self.model_weights = model.get_weights()
         self.metrics_names = self.dataset.model_metrics_names
+        self._eval_model = None
 
         # Initialize iterators
         self.epoch_index = 0
@@ -114,6 +128,19 @@ class MultiPartnerLearning(ABC):
     def build_model(self):
         return self.build_model_from_weights(self.model_weights)
 
+    def build_eval_model(self):
+        """Return a model carrying the current global weights, reusing a cached instance
+
+        Evaluations never train the model, so a single instance can be refreshed with
+        set_weights instead of being rebuilt and recompiled at every round. The cache is
+        dropped with the partners' ones whenever Keras' session is cleared.
+        """
+        if self._eval_model is None:
+            self._eval_model = self.build_model()
+        else:
+            self._eval_model.set_weights(self.model_weights)
+        return self._eval_model
+
     def build_model_from_weights(self, new_weights):
         """Generate a new model initialized with weights passed as arguments"""
         new_model = self.generate_new_model()
@@ -163,14 +190,34 @@ class MultiPartnerLearning(ABC):
 
         logger.debug(f"{epoch_nb_str} > {mb_nb_str} > {partner_id_str} > val_acc: {val_acc_str}")
 
-    def eval_and_log_model_val_perf(self):
-        model = self.build_model()
+    def round_eval_dataset(self):
+        """Return the per-round evaluation samples as a cached, batched tf.data pipeline
+
+        The evaluation samples never change across rounds, so the host-to-tensor
+        conversion and batching are done once and cached; prefetching overlaps the
+        transfer of the next batch with the evaluation of the current one."""
+        if self._round_eval_dataset is None:
+            self._round_eval_dataset = (
+                tf.data.Dataset.from_tensor_slices(self.round_eval_data)
+                .batch(constants.DEFAULT_BATCH_SIZE)
+                .cache()
+                .prefetch(tf.data.AUTOTUNE)
+            )
+        return self._round_eval_dataset
+
+    def eval_and_log_model_val_perf(self, model=None):
+        if model is None:
+            model = self.build_eval_model()
         if self.val_set == 'global':
-            hist = model.evaluate(self.val_data[0],
-                                  self.val_data[1],
-                                  batch_size=constants.DEFAULT_BATCH_SIZE,
-                                  verbose=0,
-                                  )
+            if isinstance(model, Model):
+                hist = model.evaluate(self.round_eval_dataset(), verbose=0)
+            else:
+                # Non-Keras models (e.g. Titanic's LogisticRegression) evaluate plain arrays
+                hist = model.evaluate(self.round_eval_data[0],
+                                      self.round_eval_data[1],
+                                      batch_size=constants.DEFAULT_BATCH_SIZE,
+                                      verbose=0,
+                                      )
         elif self.val_set == 'local':
             hist = [0.0, 0.0]
             for p in self.partners_list:
@@ -195,7 +242,7 @@ class MultiPartnerLearning(ABC):
 
     def eval_and_log_final_model_test_perf(self):
         logger.info("### Evaluating model on test data:")
-        model = self.build_model()
+        model = self.build_eval_model()
         if self.test_set == 'global':
             hist = model.evaluate(self.test_data[0],
                                   self.test_data[1],
@@ -223,7 +270,10 @@ class MultiPartnerLearning(ABC):
     def split_in_minibatches(self):
         """Split the dataset passed as argument in mini-batches"""
 
+        self._eval_model = None  # cached models do not survive clear_session()
+        self._round_eval_dataset = None
         for partner in self.partners_list:
+            partner.reset_model()
             partner.split_minibatches()
 
     def early_stop(self):
@@ -247,7 +297,7 @@ class MultiPartnerLearning(ABC):
     def fit(self):
         """Return the score on test data of a final aggregated model trained in a federated way on each partner"""
 
-        start = timer()
+        start = perf_counter_ns()
         # Train model (iterate for each epoch and mini-batch)
         while self.epoch_index < self.epoch_count:
 
@@ -260,10 +310,10 @@ class MultiPartnerLearning(ABC):
         # After last epoch or if early stopping was triggered, evaluate model on the global testset
         self.eval_and_log_final_model_test_perf()
 
-        end = timer()
-        self.learning_computation_time = end - start
+        end = perf_counter_ns()
+        self.learning_computation_time = (end - start) / 1e9
         logger.info(f"Training and evaluation on multiple partners: "
-                    f"done. ({np.round(self.learning_computation_time, 3)} seconds)")
+                    f"done. ({round(self.learning_computation_time, 3)} seconds)")
         if self.save_folder is not None:
             self.save_data()  # Save the model weights and the history data
 
@@ -292,7 +342,7 @@ class SinglePartnerLearning(MultiPartnerLearning):
     def fit(self):
         """Return the score on test data of a model trained on a single partner"""
 
-        start = timer()
+        start = perf_counter_ns()
         logger.info(f"## Training and evaluating model on partner with partner_id #{self.partner.id}")
 
         # Set if early stopping if needed
@@ -331,8 +381,8 @@ class SinglePartnerLearning(MultiPartnerLearning):
         self.eval_and_log_final_model_test_perf()
         self.history.nb_epochs_done = (es.stopped_epoch + 1) if es.stopped_epoch != 0 else self.epoch_count
 
-        end = timer()
-        self.learning_computation_time = end - start
+        end = perf_counter_ns()
+        self.learning_computation_time = (end - start) / 1e9
 
     def fit_epoch(self):
         pass
@@ -378,38 +428,46 @@ class FederatedAverageLearning(MultiPartnerLearning):
         for partner in self.partners_list:
             partner.model_weights = self.model_weights
 
-        # Evaluate and store accuracy of mini-batch start model
-        self.eval_and_log_model_val_perf()
-
-        # Iterate over partners for training each individual model
-        for partner_index, partner in enumerate(self.partners_list):
-            # Reference the partner's model
-            partner_model = partner.build_model()
-
-            # Train on partner local data set
-            if self.val_set == 'global':
-                history = partner_model.fit(partner.minibatched_x_train[self.minibatch_index],
-                                            partner.minibatched_y_train[self.minibatch_index],
-                                            batch_size=partner.batch_size,
-                                            verbose=0,
-                                            validation_data=self.val_data)
-            elif self.val_set == 'local':
-                history = partner_model.fit(partner.minibatched_x_train[self.minibatch_index],
-                                            partner.minibatched_y_train[self.minibatch_index],
-                                            batch_size=partner.batch_size,
-                                            verbose=0,
-                                            validation_data=(partner.x_val, partner.y_val))
-            else:
-                raise ValueError("validation set should be 'local' or 'global', not {self.val_set}")
-
-            # Log results of the round
+        # Build the models on the main thread (Keras model construction is not thread-safe),
+        # then dispatch the independent local trainings to a thread pool. TensorFlow releases the GIL
+        # while fitting, so the partners' trainings effectively run concurrently. The evaluation of
+        # the mini-batch start model only reads the already-copied global weights, so it is submitted
+        # to the same pool and overlaps with the trainings instead of delaying them.
+        eval_model = self.build_eval_model()
+        partner_models = [partner.build_model() for partner in self.partners_list]
+        with ThreadPoolExecutor(max_workers=self.partners_count + 1) as executor:
+            eval_future = executor.submit(self.eval_and_log_model_val_perf, eval_model)
+            histories = list(executor.map(self.fit_partner_model, self.partners_list, partner_models))
+        eval_future.result()  # re-raise any error met during the evaluation
+
+        # Log results of the round and update the partners' models in the models' list
+        for partner_index, (partner, partner_model, history) in enumerate(
+                zip(self.partners_list, partner_models, histories)):
             self.log_partner_perf(partner.id, partner_index, history.history)
-
-            # Update the partner's model in the models' list
             partner.model_weights = partner_model.get_weights()
 
         logger.debug("End of fedavg collaborative round.")
 
+    def fit_partner_model(self, partner, partner_model):
+        """Train a partner's model on its current mini-batch and return the fit history"""
+
+        if self.val_set == 'global':
+            history = partner_model.fit(partner.minibatched_x_train[self.minibatch_index],
+                                        partner.minibatched_y_train[self.minibatch_index],
+                                        batch_size=partner.batch_size,
+                                        verbose=0,
+                                        validation_data=self.val_data)
+        elif self.val_set == 'local':
+            history = partner_model.fit(partner.minibatched_x_train[self.minibatch_index],
+                                        partner.minibatched_y_train[self.minibatch_index],
+                                        batch_size=partner.batch_size,
+                                        verbose=0,
+                                        validation_data=(partner.x_val, partner.y_val))
+        else:
+            raise ValueError("validation set should be 'local' or 'global', not {self.val_set}")
+
+        return history
+
 
 class SequentialLearning(MultiPartnerLearning):  # seq-pure
     name = 'Sequential learning'
@@ -467,8 +525,10 @@ class SequentialLearning(MultiPartnerLearning):  # seq-pure
             self.log_partner_perf(partner.id, idx, history.history)
 
             # Save the partner's model in the models' list
-            partner.model_weights = model_for_round.get_weights()
-            self.model_weights = model_for_round.get_weights()
+            # (get_weights copies every layer, so pull them only once per round)
+            round_weights = model_for_round.get_weights()
+            partner.model_weights = round_weights
+            self.model_weights = round_weights
 
         logger.debug("End of seq collaborative round.")
 
@@ -604,6 +664,18 @@ class MplSModel(FederatedAverageLearning):
         logger.debug("End of S-Model collaborative round.")
 
 
+@tf.function(experimental_relax_shapes=True)
+def _tf_compute_grads(model, x, y):
+    """Forward and backward pass compiled into a single graph.
+
+    Tracing once per model (with relaxed shapes, so partners with different minibatch
+    sizes share the same trace) removes the per-call Python dispatch of the eager
+    GradientTape and lets TensorFlow fuse the ops of the step."""
+    with tf.GradientTape() as tape:
+        loss = model.loss(y, model(x))
+    return tape.gradient(loss, model.trainable_weights)
+
+
 class FederatedGradients(MultiPartnerLearning):
     def __init__(self, scenario, **kwargs):
         super(FederatedGradients, self).__init__(scenario, **kwargs)
@@ -637,10 +709,9 @@ class FederatedGradients(MultiPartnerLearning):
 
         # Iterate over partners for training each individual model
         for partner_index, partner in enumerate(self.partners_list):
-            with tf.GradientTape() as tape:
-                loss = self.model.loss(partner.minibatched_y_train[self.minibatch_index],
-                                       self.model(partner.minibatched_x_train[self.minibatch_index]))
-            partner.grads = tape.gradient(loss, self.model.trainable_weights)
+            partner.grads = _tf_compute_grads(self.model,
+                                              partner.minibatched_x_train[self.minibatch_index],
+                                              partner.minibatched_y_train[self.minibatch_index])
 
         global_grad = self.aggregator.aggregate_gradients()
         self.model.optimizer.apply_gradients(zip(global_grad, self.model.trainable_weights))
@@ -83,6 +83,7 @@ class PartnerMpl:
         self.minibatch_count = mpl.minibatch_count
         self.partner_parent = partner_parent
         self.model_weights = None
+        self._model = None
 
         self.minibatched_x_train = np.nan * np.zeros(self.minibatch_count)
         self.minibatched_y_train = np.nan * np.zeros(self.minibatch_count)
@@ -137,5 +138,13 @@ class PartnerMpl:
         self.minibatched_x_train = np.split(x_train, (split_indices[:-1] * len(x_train)).astype(int))
         self.minibatched_y_train = np.split(y_train, (split_indices[:-1] * len(y_train)).astype(int))
 
+    def reset_model(self):
+        """Drop the cached model, to be called whenever Keras' session is cleared"""
+        self._model = None
+
     def build_model(self):
-        return self.mpl.build_model_from_weights(self.model_weights)
+        if self._model is None:
+            self._model = self.mpl.build_model_from_weights(self.model_weights)
+        else:
+            self._model.set_weights(self.model_weights)
+        return self._model
@@ -4,15 +4,14 @@ This enables to parameterize a desired scenario to mock a multi-partner ML proje
 """
 
 import datetime
+import math
 import re
 import uuid
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from loguru import logger
-from sklearn.preprocessing import LabelEncoder
 
 from . import contributivity, constants
 from . import dataset as dataset_module
@@ -22,8 +21,60 @@ from .multi_partner_learning import MULTI_PARTNER_LEARNING_APPROACHES
 from .partner import Partner
 from .splitter import Splitter, IMPLEMENTED_SPLITTERS
 
+# Compiled once: scenario names are validated on every construction
+_WHITESPACE_RE = re.compile(r'\s')
+
+# Attributes forwarded verbatim to the constructor when a Scenario is copied.
+# Derived attributes (splitter, partners, names, folders, memoized counts, ...) are
+# deliberately absent: the constructor rebuilds them
+_COPY_KEYS = (
+    'dataset', 'dataset_proportion', 'val_set', 'test_set',
+    'partners_count', 'amounts_per_partner', 'corruption_parameters',
+    'multi_partner_learning_approach', 'aggregation_weighting',
+    'epoch_count', 'minibatch_count', 'gradient_updates_per_pass_count',
+    'is_early_stopping', 'init_model_from', 'contributivity_methods',
+    'scenario_id', 'repeat_count', 'is_quick_demo',
+)
+
+# Parameters accepted by Scenario.__init__ through kwargs (beyond the 'mpl_' prefixed
+# ones, forwarded to the mpl object). Built once: scenarios are constructed in bulk by
+# the contributivity methods, so the per-instance list rebuild and linear scans add up
+_PARAMS_KNOWN = frozenset({
+    # Dataset related
+    "dataset", "dataset_name", "dataset_proportion", "val_set", "test_set",
+    # Federated learning related
+    "contributivity_methods", "multi_partner_learning_approach", "aggregation_weighting",
+    # Partners related
+    "partners_count", "amounts_per_partner", "corruption_parameters",
+    "samples_split_option", "samples_split_configuration",
+    # Computation related
+    "gradient_updates_per_pass_count", "epoch_count", "minibatch_count", "is_early_stopping",
+    # Model related
+    "init_model_from",
+    # Misc.
+    "is_quick_demo", "save_path", "scenario_name", "repeat_count",
+})
+
 
 class Scenario:
+    # Scenarios are instantiated in bulk by the contributivity methods (up to O(2^P)
+    # transient copies for exhaustive Shapley): slots cut the per-instance dict cost
+    # and speed up attribute access
+    __slots__ = (
+        'dataset', 'dataset_proportion', 'val_set', 'test_set',
+        'partners_list', 'partners_count', 'amounts_per_partner',
+        'splitter', 'corruption_parameters',
+        'mpl', 'mpl_kwargs',
+        'multi_partner_learning_approach', '_multi_partner_learning_approach',
+        'aggregation_weighting', '_aggregation_weighting',
+        'epoch_count', 'minibatch_count', 'gradient_updates_per_pass_count',
+        'is_early_stopping', 'init_model_from', 'use_saved_weights',
+        'contributivity_list', 'contributivity_methods',
+        'scenario_id', 'repeat_count', 'is_quick_demo',
+        'scenario_name', 'short_scenario_name', 'save_folder',
+        '_nb_samples_used', '_final_relative_nb_samples',
+    )
+
     def __init__(
             self,
             partners_count,
@@ -33,6 +84,7 @@ class Scenario:
             dataset_proportion=1,
             samples_split_option='random',
             corruption_parameters=None,
+            partners_list=None,
             init_model_from="random_initialization",
             multi_partner_learning_approach="fedavg",
             aggregation_weighting="data-volume",
@@ -63,6 +115,9 @@ class Scenario:
         :param corruption_parameters: list of Corruption object, or its string identifier, one ofr each partner.
                                       Enable to artificially corrupt partner's data.
                                       For instance: [Permutation(proportion=0.2), 'random', 'not-corrupted']
+        :param partners_list: list of already-provisioned Partner objects (e.g. from another
+                              scenario, see copy(reuse_partners=True)). When provided, the
+                              data split and corruption steps are skipped.
         :param init_model_from: None (default) or path
         :param multi_partner_learning_approach: 'fedavg' (default), 'seq-pure', 'seq-with-final-agg' or 'seqavg'
                                                 Define the multi-partner learning approach
@@ -84,38 +139,7 @@ class Scenario:
 
         # Raise Exception if unknown parameters in the config of the scenario
 
-        params_known = [
-            "dataset",
-            "dataset_name",
-            "dataset_proportion",
-            "val_set",
-            "test_set"
-        ]  # Dataset related
-        params_known += [
-            "contributivity_methods",
-            "multi_partner_learning_approach",
-            "aggregation_weighting",
-        ]  # federated learning related
-        params_known += [
-            "partners_count",
-            "amounts_per_partner",
-            "corruption_parameters",
-            "samples_split_option",
-            "samples_split_configuration"
-        ]  # Partners related
-        params_known += [
-            "gradient_updates_per_pass_count",
-            "epoch_count",
-            "minibatch_count",
-            "is_early_stopping",
-        ]  # Computation related
-        params_known += ["init_model_from"]  # Model related
-        params_known += ["is_quick_demo"]
-        params_known += ["save_path",
-                         "scenario_name",
-                         "repeat_count"]
-
-        unrecognised_parameters = [x for x in kwargs.keys() if (x not in params_known and not x.startswith('mpl_'))]
+        unrecognised_parameters = [x for x in kwargs.keys() if (x not in _PARAMS_KNOWN and not x.startswith('mpl_'))]
         if len(unrecognised_parameters) > 0:
             for x in unrecognised_parameters:
                 logger.debug(f"Unrecognised parameter: {x}")
@@ -127,18 +151,10 @@ class Scenario:
         if isinstance(dataset, dataset_module.Dataset):
             self.dataset = dataset
         else:
-            # Reference the module corresponding to the dataset selected and initialize the Dataset object
-            if dataset_name == constants.MNIST:  # default
-                self.dataset = dataset_module.Mnist()
-            elif dataset_name == constants.CIFAR10:
-                self.dataset = dataset_module.Cifar10()
-            elif dataset_name == constants.TITANIC:
-                self.dataset = dataset_module.Titanic()
-            elif dataset_name == constants.ESC50:
-                self.dataset = dataset_module.Esc50()
-            elif dataset_name == constants.IMDB:
-                self.dataset = dataset_module.Imdb()
-            else:
+            # Reference the class corresponding to the dataset selected and initialize the Dataset object
+            try:
+                self.dataset = dataset_module.IMPLEMENTED_DATASETS[dataset_name]()
+            except KeyError:
                 raise Exception(
                     f"Dataset named '{dataset_name}' is not supported (yet). You can construct your own "
                     f"dataset object, or even add it by contributing to the project !"
@@ -174,7 +190,9 @@ class Scenario:
         # (% of samples of the dataset for each partner, ...
         # ... has to sum to 1, and number of items has to equal partners_count)
         self.amounts_per_partner = amounts_per_partner
-        if np.sum(self.amounts_per_partner) != 1:
+        # math.fsum avoids both the numpy dispatch on a small list and the float
+        # accumulation error that makes e.g. [0.1, 0.2, 0.7] fail an exact comparison
+        if abs(math.fsum(self.amounts_per_partner) - 1) > 1e-9:
             raise ValueError("The sum of the amount per partners you provided isn't equal to 1")
         if len(self.amounts_per_partner) != self.partners_count:
             raise AttributeError(f"The amounts_per_partner list should have a size ({len(self.amounts_per_partner)}) "
@@ -210,10 +228,11 @@ class Scenario:
             self.splitter = IMPLEMENTED_SPLITTERS[samples_split_option](**splitter_param)
 
         # To configure if the data of the partners are corrupted or not (useful for testing contributivity measures)
+        # One Corruption instance per partner, even for NoCorruption: corruption objects
+        # bind their partner via set_partner, so they cannot be shared
         if corruption_parameters:
-            self.corruption_parameters = list(
-                map(lambda x: x if isinstance(x, Corruption) else IMPLEMENTED_CORRUPTION[x](),
-                    corruption_parameters))
+            self.corruption_parameters = [c if isinstance(c, Corruption) else IMPLEMENTED_CORRUPTION[c]()
+                                          for c in corruption_parameters]
         else:
             self.corruption_parameters = [NoCorruption() for _ in range(self.partners_count)]  # default
 
@@ -301,29 +320,35 @@ class Scenario:
             raise Exception("Don't start a quick_demo without the full dataset")
 
         if self.is_quick_demo:
-            # Use less data and/or less epochs to speed up the computations
+            # Use less data and/or less epochs to speed up the computations.
+            # The Generator API with shuffle=False samples without materializing a full
+            # permutation of the dataset, unlike the legacy np.random.choice
             if len(self.dataset.x_train) > constants.TRAIN_SET_MAX_SIZE_QUICK_DEMO:
-                index_train = np.random.choice(
+                rng = np.random.default_rng()
+                index_train = rng.choice(
                     self.dataset.x_train.shape[0],
                     constants.TRAIN_SET_MAX_SIZE_QUICK_DEMO,
                     replace=False,
+                    shuffle=False,
                 )
-                index_val = np.random.choice(
+                index_val = rng.choice(
                     self.dataset.x_val.shape[0],
                     constants.VAL_SET_MAX_SIZE_QUICK_DEMO,
                     replace=False,
+                    shuffle=False,
                 )
-                index_test = np.random.choice(
+                index_test = rng.choice(
                     self.dataset.x_test.shape[0],
                     constants.TEST_SET_MAX_SIZE_QUICK_DEMO,
                     replace=False,
+                    shuffle=False,
                 )
-                self.dataset.x_train = self.dataset.x_train[index_train]
-                self.dataset.y_train = self.dataset.y_train[index_train]
-                self.dataset.x_val = self.dataset.x_val[index_val]
-                self.dataset.y_val = self.dataset.y_val[index_val]
-                self.dataset.x_test = self.dataset.x_test[index_test]
-                self.dataset.y_test = self.dataset.y_test[index_test]
+                self.dataset.x_train = np.take(self.dataset.x_train, index_train, axis=0)
+                self.dataset.y_train = np.take(self.dataset.y_train, index_train, axis=0)
+                self.dataset.x_val = np.take(self.dataset.x_val, index_val, axis=0)
+                self.dataset.y_val = np.take(self.dataset.y_val, index_val, axis=0)
+                self.dataset.x_test = np.take(self.dataset.x_test, index_test, axis=0)
+                self.dataset.y_test = np.take(self.dataset.y_test, index_test, axis=0)
             self.epoch_count = 3
             self.minibatch_count = 2
 
@@ -331,12 +356,14 @@ class Scenario:
         # Output parameters
         # -----------------
 
-        now = datetime.datetime.now()
-        now_str = now.strftime("%Y-%m-%d_%Hh%M")
-        self.scenario_name = kwargs.get('scenario_name',
-                                        f"scenario_{self.scenario_id}_repeat_{self.repeat_count}_{now_str}_"
-                                        f"{uuid.uuid4().hex[:3]}")  # to distinguish identical names
-        if re.search(r'\s', self.scenario_name):
+        if 'scenario_name' in kwargs:
+            self.scenario_name = kwargs['scenario_name']
+        else:
+            # Timestamp formatting and uuid generation only happen when no name is given
+            now_str = datetime.datetime.now().strftime("%Y-%m-%d_%Hh%M")
+            self.scenario_name = (f"scenario_{self.scenario_id}_repeat_{self.repeat_count}_{now_str}_"
+                                  f"{uuid.uuid4().hex[:3]}")  # to distinguish identical names
+        if _WHITESPACE_RE.search(self.scenario_name):
             raise ValueError(
                 f'The scenario name "{self.scenario_name}"cannot be written with space character, please use '
                 f'underscore or dash.')
@@ -351,19 +378,32 @@ class Scenario:
         # Select in the kwargs the parameters to be transferred to sub object
         # -------------------------------------------------------------------
 
-        self.mpl_kwargs = {}
-        for key, value in kwargs.items():
-            if key.startswith('mpl_'):
-                self.mpl_kwargs[key.replace('mpl_', '')] = value
+        # key[4:] strips exactly the 'mpl_' prefix (replace() would also eat any
+        # further occurrence inside the option name)
+        self.mpl_kwargs = {key[4:]: value for key, value in kwargs.items() if key.startswith('mpl_')}
+
+        # Memoization slots for the sample-count properties
+        self._nb_samples_used = None
+        self._final_relative_nb_samples = None
 
         # -----------------------
         # Provision the scenario
         # -----------------------
 
-        self.instantiate_scenario_partners()
-        self.split_data()
-        self.compute_batch_sizes()
-        self.apply_data_alteration_configuration()
+        if partners_list is not None:
+            # Reuse partners that were already split and corrupted: this skips the
+            # splitting work, which dominates the cost of copying a scenario on large
+            # datasets. Batch sizes are still recomputed, as minibatch_count may differ.
+            if len(partners_list) != self.partners_count:
+                raise AttributeError(f"The partners_list provided has a size ({len(partners_list)}) "
+                                     f"not equal to partners_count ({self.partners_count})")
+            self.partners_list = list(partners_list)
+            self.compute_batch_sizes()
+        else:
+            self.instantiate_scenario_partners()
+            self.split_data()
+            self.compute_batch_sizes()
+            self.apply_data_alteration_configuration()
 
         # ------------------------------------------------
         # Print the description of the scenario configured
@@ -371,30 +411,35 @@ class Scenario:
 
         self.log_scenario_description()
 
+    # The partners' sample counts are frozen once the scenario is provisioned, so both
+    # properties are memoized on first access (in dedicated slots, as cached_property
+    # needs an instance __dict__ which __slots__ removes)
     @property
     def nb_samples_used(self):
-        if len(self.partners_list) == 0:
-            return len(self.dataset.x_train)
-        else:
-            return sum([p.final_nb_samples for p in self.partners_list])
+        if self._nb_samples_used is None:
+            if len(self.partners_list) == 0:
+                self._nb_samples_used = len(self.dataset.x_train)
+            else:
+                self._nb_samples_used = sum([p.final_nb_samples for p in self.partners_list])
+        return self._nb_samples_used
 
     @property
     def final_relative_nb_samples(self):
-        return [p.final_nb_samples / self.nb_samples_used for p in self.partners_list]
-
-    def copy(self, **kwargs):
-        params = self.__dict__.copy()
-        for key in ['partners_list',
-                    'mpl',
-                    '_multi_partner_learning_approach',
-                    '_aggregation_weighting',
-                    'use_saved_weights',
-                    'contributivity_list',
-                    'scenario_name',
-                    'short_scenario_name',
-                    'save_folder',
-                    'splitter']:
-            del params[key]
+        if self._final_relative_nb_samples is None:
+            self._final_relative_nb_samples = [p.final_nb_samples / self.nb_samples_used
+                                               for p in self.partners_list]
+        return self._final_relative_nb_samples
+
+    def copy(self, reuse_partners=False, **kwargs):
+        params = {key: getattr(self, key) for key in _COPY_KEYS}
+        if reuse_partners:
+            # Hand the already-split partners to the copy instead of re-splitting
+            # (only sound when the copy keeps the same data distribution)
+            params['partners_list'] = self.partners_list
+        # Re-prefix the mpl options so the copy's constructor routes them as the
+        # original caller did (they were previously lost in the snapshot-and-delete)
+        for key, value in self.mpl_kwargs.items():
+            params[f'mpl_{key}'] = value
         if 'is_quick_demo' in kwargs and kwargs['is_quick_demo'] != self.is_quick_demo:
             raise ValueError("Attribute 'is_quick_demo' cannot be modified between copies.")
         if self.save_folder is not None:
@@ -410,6 +455,11 @@ class Scenario:
     def log_scenario_description(self):
         """Log the description of the scenario configured"""
 
+        # Everything below is INFO: when all sinks sit above that level, skip the
+        # dozen f-string formattings entirely (loguru formats before filtering)
+        if logger._core.min_level > logger.level("INFO").no:
+            return
+
         # Describe scenario
         logger.info("Description of data scenario configured:")
         logger.info(f"   Number of partners defined: {self.partners_count}")
@@ -422,18 +472,19 @@ class Scenario:
                     f"{self.gradient_updates_per_pass_count} gradient updates per pass")
 
         # Describe data
-        logger.info(f"Data loaded: {self.dataset.name}")
+        dataset = self.dataset
+        logger.info(f"Data loaded: {dataset.name}")
         if self.is_quick_demo:
             logger.info("   Quick demo configuration: number of data samples and epochs "
                         "are limited to speed up the run")
         logger.info(
-            f"   {len(self.dataset.x_train)} train data with {len(self.dataset.y_train)} labels"
+            f"   {len(dataset.x_train)} train data with {len(dataset.y_train)} labels"
         )
         logger.info(
-            f"   {len(self.dataset.x_val)} val data with {len(self.dataset.y_val)} labels"
+            f"   {len(dataset.x_val)} val data with {len(dataset.y_val)} labels"
         )
         logger.info(
-            f"   {len(self.dataset.x_test)} test data with {len(self.dataset.y_test)} labels"
+            f"   {len(dataset.x_test)} test data with {len(dataset.y_test)} labels"
         )
 
     def append_contributivity(self, contributivity_method):
@@ -450,25 +501,40 @@ class Scenario:
         return 0
 
     def plot_data_distribution(self):
-        lb = LabelEncoder().fit([str(y) for y in self.dataset.y_train])
+        # Deferred import: matplotlib is among the slowest imports and this plot is only
+        # drawn when a save folder is configured. The figure is only ever saved to file,
+        # so the non-interactive Agg backend is selected (no GUI backend probing)
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        # Encode the labels once with numpy (one-hot labels reduce to their hot index)
+        y_train = self.dataset.y_train
+        if y_train.ndim > 1:
+            y_train = np.argmax(y_train, axis=1)
+        classes = np.unique(y_train)
+
+        # Build the whole partners x classes distribution matrix in one pass,
+        # then only drive the plotting from it
+        hist = np.zeros((self.partners_count, self.dataset.num_classes), dtype=np.int64)
         for i, partner in enumerate(self.partners_list):
+            partner_y = partner.y_train
+            if partner_y.ndim > 1:
+                partner_y = np.argmax(partner_y, axis=1)
+            np.add.at(hist[i], np.searchsorted(classes, partner_y), 1)
 
-            plt.subplot(self.partners_count, 1, i + 1)  # TODO share y axis
-            data_count = np.bincount(lb.transform([str(y) for y in partner.y_train]))
+        fig, axes = plt.subplots(self.partners_count, 1, sharey=True,
+                                 figsize=(6, 2 * self.partners_count), squeeze=False)
+        for ax, partner, data_count in zip(axes.flat, self.partners_list, hist):
+            ax.bar(np.arange(0, self.dataset.num_classes), data_count)
+            ax.set_ylabel("partner " + str(partner.id))
 
-            # Fill with 0
-            while len(data_count) < self.dataset.num_classes:
-                data_count = np.append(data_count, 0)
-
-            plt.bar(np.arange(0, self.dataset.num_classes), data_count)
-            plt.ylabel("partner " + str(partner.id))
-
-        plt.suptitle("Data distribution")
-        plt.xlabel("Digits")
+        fig.suptitle("Data distribution")
+        axes.flat[-1].set_xlabel("Digits")
 
         (self.save_folder / 'graphs').mkdir(exist_ok=True)
-        plt.savefig(self.save_folder / "graphs" / "data_distribution.png")
-        plt.close()
+        fig.savefig(self.save_folder / "graphs" / "data_distribution.png")
+        plt.close(fig)
 
     def compute_batch_sizes(self):
 
@@ -476,28 +542,32 @@ class Scenario:
         batch_size_min = 1
         batch_size_max = constants.MAX_BATCH_SIZE
 
+        # Plain min/max on ints: np.clip on a scalar goes through ufunc dispatch
+        # and returns a numpy scalar
         if self.partners_count == 1:
             p = self.partners_list[0]
-            batch_size = int(len(p.x_train) / self.gradient_updates_per_pass_count)
-            p.batch_size = np.clip(batch_size, batch_size_min, batch_size_max)
+            batch_size = len(p.x_train) // self.gradient_updates_per_pass_count
+            p.batch_size = max(batch_size_min, min(batch_size_max, batch_size))
         else:
+            updates_per_minibatch = self.minibatch_count * self.gradient_updates_per_pass_count
             for p in self.partners_list:
-                batch_size = int(
-                    len(p.x_train)
-                    / (self.minibatch_count * self.gradient_updates_per_pass_count)
-                )
-                p.batch_size = np.clip(batch_size, batch_size_min, batch_size_max)
+                batch_size = len(p.x_train) // updates_per_minibatch
+                p.batch_size = max(batch_size_min, min(batch_size_max, batch_size))
 
         for p in self.partners_list:
             logger.debug(f"   Compute batch sizes, partner #{p.id}: {p.batch_size}")
 
     def apply_data_alteration_configuration(self):
         """perform corruption on partner if needed"""
+        # Computed once: per-partner rebuilds of these arrays made the loop quadratic
+        all_ids = np.array([p.id for p in self.partners_list])
+        all_volumes = np.array([p.data_volume for p in self.partners_list])
         for partner in self.partners_list:
             if isinstance(partner.corruption, Duplication):
                 if not partner.corruption.duplicated_partner_id:
-                    data_volume = np.array([p.data_volume for p in self.partners_list if p.id != partner.id])
-                    ids = np.array([p.id for p in self.partners_list if p.id != partner.id])
+                    mask = all_ids != partner.id
+                    data_volume = all_volumes[mask]
+                    ids = all_ids[mask]
                     candidates = ids[data_volume >= partner.data_volume * partner.corruption.proportion]
                     partner.corruption.duplicated_partner_id = np.random.choice(candidates)
                 partner.corruption.set_duplicated_partner(self.partners_list)
@@ -505,7 +575,7 @@ class Scenario:
 
     def to_dataframe(self):
 
-        df = pd.DataFrame()
+        records = []
         dict_results = {}
 
         # Scenario definition parameters
@@ -532,7 +602,7 @@ class Scenario:
         dict_results["learning_computation_time_sec"] = self.mpl.learning_computation_time
 
         if not self.contributivity_list:
-            df = df.append(dict_results, ignore_index=True)
+            records.append(dict_results.copy())
 
         for contrib in self.contributivity_list:
 
@@ -550,9 +620,10 @@ class Scenario:
                 dict_results["contributivity_score"] = contrib.contributivity_scores[i]
                 dict_results["contributivity_std"] = contrib.scores_std[i]
 
-                df = df.append(dict_results, ignore_index=True)
+                # dict_results is mutated across iterations, hence the copy
+                records.append(dict_results.copy())
 
-        return df
+        return pd.DataFrame.from_records(records)
 
     def run(self):
 
@@ -2,13 +2,26 @@
 """
 This enables to split the original dataset between the partners.
 """
+import math
 import operator
 import random
 from abc import ABC, abstractmethod
 
 import numpy as np
 from loguru import logger
-from sklearn.preprocessing import LabelEncoder
+
+
+def _encode_labels(y):
+    """Return integer-encoded labels, treating one-hot (or multi-column) labels as whole rows
+
+    Vectorized equivalent of label-encoding the labels' string representations:
+    the integer codes differ but samples are grouped identically.
+    """
+    if y.ndim > 1:
+        _, y_encoded = np.unique(y, axis=0, return_inverse=True)
+    else:
+        _, y_encoded = np.unique(y, return_inverse=True)
+    return y_encoded
 
 
 class Splitter(ABC):
@@ -59,7 +72,7 @@ class Splitter(ABC):
         self._test_amounts_per_partner_length()
 
     def _test_amounts_per_partner_total(self):
-        if np.sum(self.amounts_per_partner) != 1:
+        if abs(math.fsum(self.amounts_per_partner) - 1) > 1e-9:
             raise ValueError("The sum of the amount per partners you provided isn't equal to 1; it has to.")
 
     def _test_amounts_per_partner_length(self):
@@ -129,9 +142,8 @@ class FlexibleSplitter(Splitter):
     def _generate_subset(self, x, y):
 
         # Convert raw labels in y to simplify operations on the dataset
-        lb = LabelEncoder()
-        y_str = lb.fit_transform([str(label) for label in y])
-        labels = list(set(y_str))
+        y_str = _encode_labels(y)
+        labels = list(np.unique(y_str))
 
         # Split the datasets (x and y) into subsets of samples of each label (called "clusters")
         x_for_cluster, y_for_cluster, nb_samples_per_cluster = {}, {}, {}
@@ -191,7 +203,7 @@ class StratifiedSplitter(Splitter):
         if self.partners_count == 1:
             return [(x, y)]
         else:
-            y_str = LabelEncoder().fit_transform([str(label) for label in y])
+            y_str = _encode_labels(y)
             splitting_indices = (np.cumsum(self.amounts_per_partner)[:-1] * len(y)).astype(int)
             idxs = y_str.argsort()
             idx_list = np.split(idxs, splitting_indices)
@@ -213,11 +225,10 @@ class AdvancedSplitter(Splitter):
         return self.name + str(list(zip(self.num_clusters, self.specific_shared)))
 
     def _generate_subset(self, x, y):
-        lb = LabelEncoder()
-        y_str = lb.fit_transform([str(label) for label in y])
-        labels = list(set(y_str))
+        y_str = _encode_labels(y)
+        labels = list(np.unique(y_str))
+        nb_diff_labels = len(labels)
         np.random.shuffle(labels)
-        nb_diff_labels = len(lb.classes_)
 
         for p_id, p in enumerate(self.partners_list):
             p.cluster_count_param = self.num_clusters[p_id]
